@@ -1,22 +1,83 @@
 import configparser
-import json
+import functools
 import sys
 import os
 import time
 import subprocess
-import boto3
-from botocore.exceptions import SSOTokenLoadError
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .config import MultiKubeConfig
+from .json_utils import JSONUtils
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Account IDs resolved during this run, and the locks serializing their lookup and persistence.
+_account_ids = {}
+_account_id_locks = {}
+_account_ids_lock = threading.Lock()
+
 class AWSUtils:
     """
     Utility class for managing AWS-related operations such as loading profiles,
     ensuring SSO login, generating caches, and validating cache freshness.
     """
 
+    @staticmethod
+    def load_aws_config_index():
+        """
+        Load the profiles and their SSO settings from the user's AWS configuration file.
+
+        Parsing is skipped when the file has not changed: the result is memoized per modification
+        time within the process and persisted to PROFILES_FILE for later invocations.
+
+        Returns:
+            dict: A mapping of profile names to their SSO settings ("sso_session" and/or "sso_start_url"),
+            in the order they appear in the AWS configuration file.
+        """
+        try:
+            source_mtime = os.stat(os.path.expanduser("~/.aws/config")).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        return AWSUtils._parse_aws_config(source_mtime)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _parse_aws_config(source_mtime):
+        """
+        Return the profile index for a given version of the AWS configuration file, reusing the
+        persisted index when it was built from the same version.
+
+        Args:
+            source_mtime (int): Modification time of the AWS configuration file, in nanoseconds.
+
+        Returns:
+            dict: A mapping of profile names to their SSO settings.
+        """
+        try:
+            index = JSONUtils.load(MultiKubeConfig.PROFILES_FILE)
+            if index.get("source_mtime") == source_mtime:
+                return index["profiles"]
+        except (FileNotFoundError, ValueError):
+            pass
+
+        config = configparser.RawConfigParser(interpolation=None)
+        config.read(os.path.expanduser("~/.aws/config"))
+        profiles = {
+            section.split(" ", 1)[1]: {
+                key: config.get(section, key)
+                for key in ("sso_session", "sso_start_url")
+                if config.has_option(section, key)
+            }
+            for section in config.sections()
+            if section.startswith("profile ")
+        }
+        try:
+            JSONUtils.dump(MultiKubeConfig.PROFILES_FILE, {"source_mtime": source_mtime, "profiles": profiles})
+        except OSError as e:
+            logger.debug("Could not persist the AWS profile index: %s", e)
+        return profiles
+
     @staticmethod
     def load_profiles_from_aws_config():
         """
@@ -25,19 +86,57 @@ class AWSUtils:
         Returns:
             list: A list of profile names found in the AWS configuration file.
         """
-        profiles = []
-        aws_config_path = os.path.expanduser("~/.aws/config")
-        if os.path.exists(aws_config_path):
-            config = configparser.ConfigParser()
-            config.read(aws_config_path)
-            profiles = [
-                section.split(" ", 1)[1] for section in config.sections()
-                if section.startswith("profile ")
-            ]
-        return profiles
+        return list(AWSUtils.load_aws_config_index())
+
+    @staticmethod
+    def load_sso_logins(profiles):
+        """
+        Group profiles by the SSO login that covers them, so each login only has to happen once.
+
+        Profiles referencing an `sso_session` are logged in with `--sso-session`; legacy profiles
+        sharing an `sso_start_url` are logged in once through the first of them. Profiles without
+        SSO configuration are skipped.
+
+        Args:
+            profiles (list): The AWS profile names.
+
+        Returns:
+            list: The argument lists to pass to `aws sso login`, one per distinct SSO login.
+        """
+        index = AWSUtils.load_aws_config_index()
+        logins = {}
+        for profile in profiles:
+            settings = index.get(profile, {})
+            if "sso_session" in settings:
+                sso_session = settings["sso_session"]
+                logins.setdefault(("sso_session", sso_session), ["--sso-session", sso_session])
+            elif "sso_start_url" in settings:
+                start_url = settings["sso_start_url"]
+                logins.setdefault(("sso_start_url", start_url), ["--profile", profile])
+        return list(logins.values())
+
+    @staticmethod
+    def sso_login(login_args):
+        """
+        Run an interactive `aws sso login`.
+
+        Args:
+            login_args (list): Arguments selecting the SSO session or profile to log in with.
+
+        Raises:
+            SystemExit: If SSO login fails.
+        """
+        try:
+            subprocess.run(["aws", "sso", "login", *login_args], check=True)
+            logging.info("SSO login successful.")
+        except subprocess.CalledProcessError:
+            logger.error(
+                "Failed to log in to AWS SSO with '%s'. Ensure your AWS SSO config is correct.", " ".join(login_args)
+            )
+            sys.exit(1)
 
     @staticmethod
-    def ensure_sso_login(profile, init=False):
+    def ensure_sso_login(profile):
         """
         Ensure that the given AWS profile has a valid SSO token. If not, prompt the user to log in.
 
@@ -47,55 +146,225 @@ class AWSUtils:
         Raises:
             SystemExit: If SSO login fails or an unexpected error occurs.
         """
+        import boto3
+        from botocore.exceptions import SSOTokenLoadError
+
         try:
-            if init:
-                subprocess.run(["aws", "sso", "login", "--profile", profile], check=True)
-                logging.info("SSO login successful.")
             session = boto3.Session(profile_name=profile)
-            session.client("sts").get_caller_identity()
+            identity = session.client("sts").get_caller_identity()
+            AWSUtils.remember_account_id(profile, identity["Account"])
         except SSOTokenLoadError:
             logging.info("SSO token for profile %s is missing or expired.", profile)
             logging.info("Attempting to log in to AWS SSO...")
-            try:
-                subprocess.run(["aws", "sso", "login", "--profile", profile], check=True)
-                logging.info("SSO login successful.")
-            except subprocess.CalledProcessError:
-                logger.error(
-                    "Failed to log in to AWS SSO for profile '%s'. Ensure your AWS SSO config is correct.", profile
-                )
-                sys.exit(1)
+            AWSUtils.sso_login(["--profile", profile])
         except Exception as e:
             logger.error("Unexpected error while checking SSO login for profile '%s': %s", profile, e)
             sys.exit(1)
 
     @staticmethod
-    def generate_cache(profiles, init=False):
-        regions = MultiKubeConfig.load_or_prompt_regions()
-        cache_data = {}
+    def load_account_ids():
+        """
+        Load the persisted profile to account ID mapping.
 
-        for profile in profiles:
-            profile_cache = []
-            for region in regions:
-                try:
-                    AWSUtils.ensure_sso_login(profile, init)
-                    init = False
-                    session = boto3.Session(profile_name=profile, region_name=region)
-                    account_id = session.client("sts").get_caller_identity()["Account"]
-                    eks_client = session.client("eks")
-                    clusters = eks_client.list_clusters()["clusters"]
-
-                    profile_cache.extend([f"{account_id}/{region}/{cluster}" for cluster in clusters])
-                    logging.info("Successfully listed clusters for profile '%s' in region '%s' and account '%s'.", profile, region, account_id)
-                except boto3.exceptions.Boto3Error as e:
-                    logging.error("Failed to list clusters for profile '%s' in region '%s': %s", profile, region, e)
-                except Exception as e:
-                    logging.error("Unexpected error with profile '%s' in region '%s': %s", profile, region, e)
-
-            cache_data[profile] = profile_cache
-
-        with open(MultiKubeConfig.CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(cache_data, f)
+        Returns:
+            dict: Entries of the form {profile: {"account_id": str, "fetched_at": float}}.
+        """
+        try:
+            return JSONUtils.load(MultiKubeConfig.ACCOUNT_IDS_FILE)
+        except FileNotFoundError:
+            return {}
+
+    @staticmethod
+    def remember_account_id(profile, account_id):
+        """
+        Record the account ID of a profile for the rest of the run and persist it for later invocations.
+
+        Args:
+            profile (str): The AWS profile name.
+            account_id (str): The AWS account ID.
+        """
+        with _account_ids_lock:
+            _account_ids[profile] = account_id
+            account_ids = AWSUtils.load_account_ids()
+            account_ids[profile] = {"account_id": account_id, "fetched_at": time.time()}
+            JSONUtils.dump(MultiKubeConfig.ACCOUNT_IDS_FILE, account_ids)
+
+    @staticmethod
+    def get_account_id(profile):
+        """
+        Return the AWS account ID behind a profile.
+
+        The account ID never changes for a profile, so it is memoized for the lifetime of the process and
+        persisted to disk, guarded by ACCOUNT_IDS_TTL, so later invocations skip STS entirely. Concurrent
+        callers for the same profile wait for a single STS lookup.
+
+        Args:
+            profile (str): The AWS profile name.
+
+        Returns:
+            str: The AWS account ID.
+        """
+        with _account_ids_lock:
+            profile_lock = _account_id_locks.setdefault(profile, threading.Lock())
+
+        with profile_lock:
+            if profile in _account_ids:
+                return _account_ids[profile]
+
+            with _account_ids_lock:
+                entry = AWSUtils.load_account_ids().get(profile)
+            if entry and (time.time() - entry["fetched_at"]) < MultiKubeConfig.ACCOUNT_IDS_TTL:
+                _account_ids[profile] = entry["account_id"]
+                return entry["account_id"]
+
+            import boto3
+            from botocore.config import Config
+
+            sts_client = boto3.Session(profile_name=profile).client(
+                "sts", config=Config(retries=MultiKubeConfig.AWS_RETRIES)
+            )
+            account_id = sts_client.get_caller_identity()["Account"]
+            AWSUtils.remember_account_id(profile, account_id)
+            return account_id
+
+    @staticmethod
+    def filter_eks_regions(regions):
+        """
+        Drop the regions in which EKS is not available so they are never queried.
+
+        The lookup uses the endpoint data bundled with botocore and does not make any network calls.
+
+        Args:
+            regions (list): The configured AWS regions.
+
+        Returns:
+            list: The configured regions that support EKS, in their original order.
+        """
+        import boto3
+
+        session = boto3.Session()
+        supported = {
+            region
+            for partition in session.get_available_partitions()
+            for region in session.get_available_regions("eks", partition_name=partition)
+        }
+        for region in regions:
+            if region not in supported:
+                logger.warning("Skipping region '%s': EKS is not available there.", region)
+        return [region for region in regions if region in supported]
+
+    @staticmethod
+    def _list_clusters_for(profile, region):
+        """
+        List the EKS clusters visible to a profile in a single region.
+
+        A dedicated boto3 session is built on every call so the method can safely run in a worker thread.
+
+        Args:
+            profile (str): The AWS profile name.
+            region (str): The AWS region to query.
+
+        Returns:
+            list: The names of the clusters in the region.
+        """
+        import boto3
+        from botocore.config import Config
+
+        session = boto3.Session(profile_name=profile, region_name=region)
+        eks_client = session.client("eks", config=Config(retries=MultiKubeConfig.AWS_RETRIES))
+        paginator = eks_client.get_paginator("list_clusters")
+        return [
+            cluster
+            for page in paginator.paginate(PaginationConfig={"PageSize": 100})
+            for cluster in page["clusters"]
+        ]
+
+    @staticmethod
+    def generate_cache(profiles, init=False, max_concurrency=MultiKubeConfig.MAX_CONCURRENCY):
+        """
+        Discover the EKS clusters of every profile in every configured region and write them to the cache file.
+
+        With init, SSO logins run sequentially first so interactive browser flows never race. Routine
+        refreshes skip the per-profile login check; authentication errors are handled per pair instead.
+        The account ID of each profile is then resolved once, and the cluster listing for each
+        (profile, region) pair is fanned out over a thread pool. Pairs that fail to list keep their
+        previously cached clusters, so a transient error does not drop them from the cache.
+
+        Args:
+            profiles (list): The AWS profile names to scan.
+            init (bool): Force an SSO login before scanning, once per distinct SSO session, and verify
+                every profile's credentials.
+            max_concurrency (int): Maximum number of concurrent AWS API calls.
+
+        Returns:
+            bool: True if the cache file was written, False if every (profile, region) pair failed
+            and the cache was left untouched.
+        """
+        import boto3
+
+        regions = AWSUtils.filter_eks_regions(MultiKubeConfig.load_or_prompt_regions())
+        cache_data = {profile: [] for profile in profiles}
+
+        if init:
+            for login_args in AWSUtils.load_sso_logins(profiles):
+                AWSUtils.sso_login(login_args)
+            for profile in profiles:
+                AWSUtils.ensure_sso_login(profile)
+
+        account_ids = {}
+        failed_pairs = set()
+        if profiles and regions:
+            with ThreadPoolExecutor(
+                max_workers=min(max_concurrency, len(profiles) * len(regions))
+            ) as executor:
+                futures = {executor.submit(AWSUtils.get_account_id, profile): profile for profile in profiles}
+                for future in as_completed(futures):
+                    profile = futures[future]
+                    try:
+                        account_ids[profile] = future.result()
+                    except Exception as e:
+                        failed_pairs.update((profile, region) for region in regions)
+                        logging.error("Failed to resolve the account ID of profile '%s': %s", profile, e)
+
+                futures = {
+                    executor.submit(AWSUtils._list_clusters_for, profile, region): (profile, region)
+                    for profile in profiles if profile in account_ids
+                    for region in regions
+                }
+                for future in as_completed(futures):
+                    profile, region = futures[future]
+                    account_id = account_ids[profile]
+                    try:
+                        clusters = future.result()
+                        cache_data[profile].extend(
+                            {"account_id": account_id, "region": region, "name": cluster} for cluster in clusters
+                        )
+                        logging.info("Successfully listed clusters for profile '%s' in region '%s' and account '%s'.", profile, region, account_id)
+                    except boto3.exceptions.Boto3Error as e:
+                        failed_pairs.add((profile, region))
+                        logging.error("Failed to list clusters for profile '%s' in region '%s': %s", profile, region, e)
+                    except Exception as e:
+                        failed_pairs.add((profile, region))
+                        logging.error("Unexpected error with profile '%s' in region '%s': %s", profile, region, e)
+
+        if failed_pairs and len(failed_pairs) == len(profiles) * len(regions):
+            logging.error("Failed to list clusters for every profile and region; the cluster cache was not updated.")
+            return False
+
+        if failed_pairs:
+            try:
+                previous_cache = AWSUtils.load_cache()
+            except (OSError, ValueError):
+                previous_cache = {}
+            for profile in profiles:
+                cache_data[profile].extend(
+                    record for record in previous_cache.get(profile, [])
+                    if (profile, record["region"]) in failed_pairs
+                )
+
+        JSONUtils.dump(MultiKubeConfig.CACHE_FILE, cache_data, compressed=True)
         logging.info("Cache generated successfully.")
+        return True
 
     @staticmethod
     def is_cache_fresh():
@@ -105,10 +374,11 @@ class AWSUtils:
         Returns:
             bool: True if the cache is fresh, False otherwise.
         """
-        cache_path = MultiKubeConfig.CACHE_FILE
-        if os.path.exists(cache_path):
-            return (time.time() - os.path.getmtime(cache_path)) < MultiKubeConfig.CACHE_TTL
-        return False
+        try:
+            cache_mtime = os.stat(MultiKubeConfig.CACHE_FILE).st_mtime
+        except FileNotFoundError:
+            return False
+        return (time.time() - cache_mtime) < MultiKubeConfig.CACHE_TTL
 
     @staticmethod
     def load_cache():
@@ -116,7 +386,6 @@ class AWSUtils:
         Load the cached data from the cache file.
 
         Returns:
-            dict: The cached data as a dictionary.
+            dict: A mapping of profile names to lists of {"account_id", "region", "name"} cluster records.
         """
-        with open(MultiKubeConfig.CACHE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return JSONUtils.load(MultiKubeConfig.CACHE_FILE, compressed=True)
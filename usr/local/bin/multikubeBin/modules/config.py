@@ -1,6 +1,6 @@
 import os
-import json
 import logging
+from .json_utils import JSONUtils
 
 logger = logging.getLogger(__name__)
 
@@ -10,17 +10,23 @@ class MultiKubeConfig:
     """
 
     MULTIKUBE_DIR = os.path.expanduser("~/.multikube")
-    CACHE_FILE = os.path.join(MULTIKUBE_DIR, "cluster_cache.json")
+    CACHE_FILE = os.path.join(MULTIKUBE_DIR, "cluster_cache.json.gz")
     KUBECONFIG_DIR = os.path.join(MULTIKUBE_DIR, "kubeconfigs")
     CONTEXTS_FILE = os.path.join(MULTIKUBE_DIR, "contexts.json")
     DEFAULT_CONTEXT_FILE = os.path.join(MULTIKUBE_DIR, "default_context.json")
     EKS_REGIONS_FILE = os.path.join(MULTIKUBE_DIR, "eks_regions.json")
+    ACCOUNT_IDS_FILE = os.path.join(MULTIKUBE_DIR, "account_ids.json")
+    PROFILES_FILE = os.path.join(MULTIKUBE_DIR, "profiles.json")
 
-    CACHE_TTL = int(os.getenv("MULTIKUBE_CACHE_TTL", "31536000"))  # Default: 1 year
+    CACHE_TTL = int(os.getenv("MULTIKUBE_CACHE_TTL", "86400"))  # Default: 1 day
     KUBECONFIG_TTL = int(os.getenv("MULTIKUBE_KUBECONFIG_TTL", "31536000"))  # Default: 1 year
+    ACCOUNT_IDS_TTL = int(os.getenv("MULTIKUBE_ACCOUNT_IDS_TTL", "31536000"))  # Default: 1 year
+
+    MAX_CONCURRENCY = max(1, int(os.getenv("MULTIKUBE_MAX_CONCURRENCY", "16")))
 
     RETRY_COUNT = 3
     RETRY_BACKOFF = 2
+    AWS_RETRIES = {"max_attempts": 10, "mode": "adaptive"}
 
     @staticmethod
     def initialize_directories():
@@ -38,15 +44,15 @@ class MultiKubeConfig:
         Returns:
             List[str]: A list of AWS regions.
         """
-        if os.path.exists(MultiKubeConfig.EKS_REGIONS_FILE):
-            with open(MultiKubeConfig.EKS_REGIONS_FILE, "r", encoding="utf-8") as file:
-                regions = json.load(file).get('regions', [])
-                if regions:
-                    return regions
+        try:
+            regions = JSONUtils.load(MultiKubeConfig.EKS_REGIONS_FILE).get('regions', [])
+            if regions:
+                return regions
+        except FileNotFoundError:
+            pass
 
         logger.error("No AWS regions configuration found.")
         user_input = input("Please enter comma-separated AWS regions (e.g., us-east-1,eu-west-1): ")
         regions = [region.strip() for region in user_input.split(",")]
-        with open(MultiKubeConfig.EKS_REGIONS_FILE, "w", encoding="utf-8") as file:
-            json.dump({"regions": regions}, file)
+        JSONUtils.dump(MultiKubeConfig.EKS_REGIONS_FILE, {"regions": regions})
         return regions
@@ -1,12 +1,13 @@
-import json
+import re
 import sys
-import os
-import inquirer
 from .config import MultiKubeConfig
+from .json_utils import JSONUtils
 import logging
 
 logger = logging.getLogger(__name__)
 
+REGEX_METACHARACTERS = frozenset(".^$*+?{}[]\\|()")
+
 class ContextManager:
     """
     A utility class for managing cluster contexts, including storing, retrieving, and setting default contexts.
@@ -34,8 +35,7 @@ class ContextManager:
 
         contexts[context_name] = pattern
 
-        with open(MultiKubeConfig.CONTEXTS_FILE, "w", encoding="utf-8") as f:
-            json.dump(contexts, f)
+        JSONUtils.dump(MultiKubeConfig.CONTEXTS_FILE, contexts)
         logger.info("Context %s with pattern %s stored successfully.", context_name, pattern)
 
     @staticmethod
@@ -49,18 +49,16 @@ class ContextManager:
         Raises:
             SystemExit: If the context name is not found or no contexts are stored.
         """
-        if os.path.exists(MultiKubeConfig.CONTEXTS_FILE):
-            with open(MultiKubeConfig.CONTEXTS_FILE, "r", encoding="utf-8") as f:
-                contexts = json.load(f)
-            if context_name in contexts:
-                with open(MultiKubeConfig.DEFAULT_CONTEXT_FILE, "w", encoding="utf-8") as f:
-                    json.dump({"default_context": context_name}, f)
-                logger.info("Default context set to %s", context_name)
-            else:
-                logger.info("Context %s not found.", context_name)
-        else:
+        try:
+            contexts = JSONUtils.load(MultiKubeConfig.CONTEXTS_FILE)
+        except FileNotFoundError:
             logger.error("No contexts stored. Use --store-clusters-contexts to add contexts first.")
             sys.exit(1)
+        if context_name in contexts:
+            JSONUtils.dump(MultiKubeConfig.DEFAULT_CONTEXT_FILE, {"default_context": context_name})
+            logger.info("Default context set to %s", context_name)
+        else:
+            logger.info("Context %s not found.", context_name)
 
     @staticmethod
     def get_default_context_pattern():
@@ -70,14 +68,12 @@ class ContextManager:
         Returns:
             str or None: The pattern for the default context, or None if no default context exists.
         """
-        if os.path.exists(MultiKubeConfig.DEFAULT_CONTEXT_FILE):
-            with open(MultiKubeConfig.DEFAULT_CONTEXT_FILE, "r", encoding="utf-8") as f:
-                default_context = json.load(f).get("default_context")
-            if os.path.exists(MultiKubeConfig.CONTEXTS_FILE):
-                with open(MultiKubeConfig.CONTEXTS_FILE, "r", encoding="utf-8") as f:
-                    contexts = json.load(f)
-                return contexts.get(default_context, None)
-        return None
+        try:
+            default_context = JSONUtils.load(MultiKubeConfig.DEFAULT_CONTEXT_FILE).get("default_context")
+            contexts = JSONUtils.load(MultiKubeConfig.CONTEXTS_FILE)
+        except FileNotFoundError:
+            return None
+        return contexts.get(default_context, None)
 
     @staticmethod
     def prompt_user_for_context():
@@ -90,21 +86,41 @@ class ContextManager:
         Raises:
             SystemExit: If no contexts are available.
         """
-        if os.path.exists(MultiKubeConfig.CONTEXTS_FILE):
-            with open(MultiKubeConfig.CONTEXTS_FILE, "r", encoding="utf-8") as f:
-                contexts = json.load(f)
-            context_choices = list(contexts.keys())
-            question = [
-                inquirer.List(
-                    "context",
-                    message="Select a context",
-                    choices=context_choices
-                )
-            ]
-            answer = inquirer.prompt(question)
-            return contexts.get(answer["context"])
-        logger.error("No contexts available. Please add one using --store-clusters-contexts.")
-        sys.exit(1)
+        import inquirer
+
+        try:
+            contexts = JSONUtils.load(MultiKubeConfig.CONTEXTS_FILE)
+        except FileNotFoundError:
+            logger.error("No contexts available. Please add one using --store-clusters-contexts.")
+            sys.exit(1)
+        context_choices = list(contexts.keys())
+        question = [
+            inquirer.List(
+                "context",
+                message="Select a context",
+                choices=context_choices
+            )
+        ]
+        answer = inquirer.prompt(question)
+        return contexts.get(answer["context"])
+
+    @staticmethod
+    def build_cluster_matcher(pattern):
+        """
+        Build a predicate that tells whether a cluster name matches a context pattern.
+
+        Patterns are matched from the start of the cluster name. Patterns without any regex
+        metacharacters are plain prefixes and are matched with str.startswith instead of a regex.
+
+        Args:
+            pattern (str): The context pattern.
+
+        Returns:
+            callable: A function taking a cluster name and returning a truthy value on a match.
+        """
+        if REGEX_METACHARACTERS.isdisjoint(pattern):
+            return lambda name: name.startswith(pattern)
+        return re.compile(pattern).match
 
     @staticmethod
     def load_contexts():
@@ -114,7 +130,7 @@ class ContextManager:
         Returns:
             dict: A dictionary of context names and their associated patterns.
         """
-        if os.path.exists(MultiKubeConfig.CONTEXTS_FILE):
-            with open(MultiKubeConfig.CONTEXTS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return {}
+        try:
+            return JSONUtils.load(MultiKubeConfig.CONTEXTS_FILE)
+        except FileNotFoundError:
+            return {}
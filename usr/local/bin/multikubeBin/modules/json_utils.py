@@ -0,0 +1,64 @@
+import gzip
+import json
+import os
+import tempfile
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONUtils:
+    """
+    Utility class for reading and writing the JSON files used by MultiKube.
+    Uses orjson when it is installed and falls back to the standard json module otherwise.
+    """
+
+    @staticmethod
+    def load(path, compressed=False):
+        """
+        Load a JSON document from a file.
+
+        Args:
+            path (str): Path to the JSON file.
+            compressed (bool): Whether the file is gzip-compressed.
+
+        Returns:
+            The decoded JSON document.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if compressed:
+            data = gzip.decompress(data)
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+    @staticmethod
+    def dump(path, obj, compressed=False):
+        """
+        Write an object to a file as JSON.
+
+        The data is written to a temporary file first and then moved into place, so an
+        interrupted write never leaves a truncated file behind.
+
+        Args:
+            path (str): Path to the JSON file.
+            obj: The JSON-serializable object to write.
+            compressed (bool): Whether to gzip-compress the file.
+        """
+        if orjson is not None:
+            data = orjson.dumps(obj)
+        else:
+            data = json.dumps(obj).encode("utf-8")
+        if compressed:
+            data = gzip.compress(data)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
@@ -1,122 +1,366 @@
+import asyncio
+import base64
 import os
+import random
+import shutil
 import time
 import subprocess
-import boto3
+import threading
 from .config import MultiKubeConfig
-from botocore.exceptions import CredentialRetrievalError
+from .json_utils import JSONUtils
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Size of the reads from kubectl's stdout; lines are split from these chunks, so their length is unbounded.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Resolved once so every kubectl invocation skips the PATH lookup.
+KUBECTL_BIN = shutil.which("kubectl") or "kubectl"
+
+# Kubeconfig documents loaded or written during this run, keyed by path, and the locks serializing their updates.
+_loaded_kubeconfigs = {}
+_kubeconfig_locks = {}
+_kubeconfig_locks_guard = threading.Lock()
+
+
+def _kubeconfig_lock(kubeconfig_path):
+    with _kubeconfig_locks_guard:
+        return _kubeconfig_locks.setdefault(kubeconfig_path, threading.Lock())
+
+
+# One boto3 session per profile, so credentials are resolved once per profile rather than once per cluster.
+# Sessions are not thread-safe, so clients are created under a lock; the clients themselves are.
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _client_for(profile, service, region, **kwargs):
+    import boto3
+
+    with _sessions_lock:
+        session = _sessions.get(profile)
+        if session is None:
+            session = _sessions[profile] = boto3.Session(profile_name=profile)
+        return session.client(service, region_name=region, **kwargs)
+
+
+async def _read_lines(stream):
+    # StreamReader's own line iteration raises ValueError on lines longer than its buffer limit.
+    # Only each new chunk is scanned; pieces of an unfinished line are joined once its newline arrives.
+    pending = []
+    while chunk := await stream.read(STREAM_CHUNK_SIZE):
+        *lines, remainder = chunk.split(b"\n")
+        if lines:
+            pending.append(lines[0])
+            lines[0] = b"".join(pending)
+            pending = []
+            for line in lines:
+                yield line
+        if remainder:
+            pending.append(remainder)
+    if pending:
+        yield b"".join(pending)
+
+
 class KubeUtils:
     """
     Utility class for managing kubeconfig files and executing kubectl commands.
     """
 
     @staticmethod
-    def update_kubeconfig(cluster_name, profile, region):
+    def context_name(cluster_name, region):
+        """
+        Return the name of the kubeconfig context of a cluster within its account's kubeconfig.
+
+        Args:
+            cluster_name (str): EKS cluster name.
+            region (str): AWS region of the cluster.
+
+        Returns:
+            str: The context name.
+        """
+        return f"{region}/{cluster_name}"
+
+    @staticmethod
+    def add_cluster_to_kubeconfig(kubeconfig, context, cluster, profile, region):
+        """
+        Add an EKS cluster to a kubeconfig document, replacing any previous entries of the same context.
+        The entries are equivalent to the ones written by `aws eks update-kubeconfig`.
+
+        Args:
+            kubeconfig (dict): The kubeconfig document to update in place.
+            context (str): Name used for the cluster, user and context entries.
+            cluster (dict): The cluster description returned by the EKS DescribeCluster API.
+            profile (str): AWS profile name used by the token exec plugin.
+            region (str): AWS region of the cluster.
+        """
+        entries = {
+            "clusters": {
+                "name": context,
+                "cluster": {
+                    "server": cluster["endpoint"],
+                    "certificate-authority-data": cluster["certificateAuthority"]["data"],
+                },
+            },
+            "contexts": {"name": context, "context": {"cluster": context, "user": context}},
+            "users": {
+                "name": context,
+                "user": {
+                    "exec": {
+                        "apiVersion": "client.authentication.k8s.io/v1beta1",
+                        "command": "aws",
+                        "args": [
+                            "--region", region, "eks", "get-token",
+                            "--cluster-name", cluster["name"], "--output", "json",
+                        ],
+                        "env": [{"name": "AWS_PROFILE", "value": profile}],
+                    }
+                },
+            },
+        }
+        for key, entry in entries.items():
+            kubeconfig[key] = [item for item in kubeconfig[key] if item["name"] != context] + [entry]
+
+    @staticmethod
+    def scan_kubeconfigs():
         """
-        Update or retrieve the kubeconfig for a specific EKS cluster and AWS profile.
+        Collect the modification times of all kubeconfig files with a single directory scan.
+
+        Returns:
+            dict: A mapping of kubeconfig file names to their modification times.
+        """
+        try:
+            with os.scandir(MultiKubeConfig.KUBECONFIG_DIR) as entries:
+                return {entry.name: entry.stat().st_mtime for entry in entries if entry.is_file()}
+        except FileNotFoundError:
+            return {}
+
+    @staticmethod
+    def update_kubeconfig(cluster_name, profile, region, account_id, kubeconfig_mtimes=None):
+        """
+        Update or retrieve the kubeconfig context for a specific EKS cluster and AWS profile.
+
+        All clusters of an account share one kubeconfig file with a context per cluster. Entries are
+        generated in-process from the EKS DescribeCluster API instead of shelling out to
+        `aws eks update-kubeconfig`. A kubeconfig that is still within KUBECONFIG_TTL and already
+        contains the cluster is used without touching the network.
 
         Args:
             cluster_name (str): EKS cluster name.
             profile (str): AWS profile name.
+            region (str): AWS region of the cluster.
+            account_id (str): AWS account ID owning the cluster, as stored in the cluster cache.
+            kubeconfig_mtimes (dict, optional): Modification times from scan_kubeconfigs, used instead of
+                stating the kubeconfig file again.
 
         Returns:
-            str: Path to the updated or existing kubeconfig file.
+            tuple: Path to the account's kubeconfig file and the name of the cluster's context in it.
 
         Raises:
-            subprocess.CalledProcessError: If the AWS CLI command fails.
+            botocore.exceptions.ClientError: If the cluster cannot be described.
         """
-        session = boto3.Session(profile_name=profile)
+        kubeconfig_name = f"{account_id}.kubeconfig"
+        kubeconfig_path = os.path.join(MultiKubeConfig.KUBECONFIG_DIR, kubeconfig_name)
+        context = KubeUtils.context_name(cluster_name, region)
+
+        with _kubeconfig_lock(kubeconfig_path):
+            kubeconfig = _loaded_kubeconfigs.get(kubeconfig_path)
+            if kubeconfig is None:
+                if kubeconfig_mtimes is not None:
+                    mtime = kubeconfig_mtimes.get(kubeconfig_name)
+                else:
+                    try:
+                        mtime = os.stat(kubeconfig_path).st_mtime
+                    except FileNotFoundError:
+                        mtime = None
+                if mtime is not None and (time.time() - mtime) < MultiKubeConfig.KUBECONFIG_TTL:
+                    kubeconfig = JSONUtils.load(kubeconfig_path)
+                else:
+                    kubeconfig = {
+                        "apiVersion": "v1",
+                        "kind": "Config",
+                        "preferences": {},
+                        "clusters": [],
+                        "contexts": [],
+                        "users": [],
+                    }
+                _loaded_kubeconfigs[kubeconfig_path] = kubeconfig
+
+            if any(item["name"] == context for item in kubeconfig["contexts"]):
+                return kubeconfig_path, context
+
+        # Describe the cluster without holding the lock, so clusters of the same account are fetched in parallel.
+        from botocore.config import Config
+        from botocore.exceptions import CredentialRetrievalError
+
+        eks_client = _client_for(profile, "eks", region, config=Config(retries=MultiKubeConfig.AWS_RETRIES))
         try:
-            account_id = session.client("sts").get_caller_identity()["Account"]
+            cluster = eks_client.describe_cluster(name=cluster_name)["cluster"]
         except CredentialRetrievalError as e:
             raise SystemExit("Failed to retrieve credentials. Please ensure you are logged in via SSO.") from e
 
-        kubeconfig_path = os.path.join(MultiKubeConfig.KUBECONFIG_DIR, f"{account_id}-{cluster_name}.kubeconfig")
-
-        if os.path.exists(kubeconfig_path) and (
-            time.time() - os.path.getmtime(kubeconfig_path)
-        ) < MultiKubeConfig.KUBECONFIG_TTL:
-            return kubeconfig_path
-
-        env = os.environ.copy()
-        env["AWS_PROFILE"] = profile
-        subprocess.run(
-            [
-                "aws",
-                "eks",
-                "update-kubeconfig",
-                "--name",
-                cluster_name,
-                "--kubeconfig",
-                kubeconfig_path,
-                "--profile",
-                profile,
-                "--region",
-                region
-            ],
-            env=env,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True,
+        with _kubeconfig_lock(kubeconfig_path):
+            if not any(item["name"] == context for item in kubeconfig["contexts"]):
+                KubeUtils.add_cluster_to_kubeconfig(kubeconfig, context, cluster, profile, region)
+                JSONUtils.dump(kubeconfig_path, kubeconfig)
+        return kubeconfig_path, context
+
+    @staticmethod
+    def generate_token(cluster_name, profile, region):
+        """
+        Generate an EKS bearer token in-process, equivalent to `aws eks get-token`.
+
+        Handing the token to kubectl through write_session_kubeconfig avoids spawning the
+        AWS CLI exec plugin for every kubectl invocation.
+
+        Args:
+            cluster_name (str): EKS cluster name.
+            profile (str): AWS profile name.
+            region (str): AWS region of the cluster.
+
+        Returns:
+            str: A bearer token accepted by the cluster's API server.
+        """
+        sts_client = _client_for(profile, "sts", region)
+
+        def add_cluster_header(request, **kwargs):
+            request.headers["x-k8s-aws-id"] = cluster_name
+
+        sts_client.meta.events.register("before-sign.sts.GetCallerIdentity", add_cluster_header)
+        url = sts_client.generate_presigned_url(
+            "get_caller_identity", Params={}, ExpiresIn=60, HttpMethod="GET"
         )
-        return kubeconfig_path
+        return "k8s-aws-v1." + base64.urlsafe_b64encode(url.encode("utf-8")).decode("utf-8").rstrip("=")
 
     @staticmethod
-    def execute_kubectl_command(cluster_name, kubeconfig_path, kubectl_args):
+    def write_session_kubeconfig(run_dir, kubeconfig_path, context, token):
+        """
+        Write a kubeconfig for a single kubectl invocation that authenticates with a bearer token.
+
+        The token is kept out of kubectl's command line, where other local users could read it.
+        The file is created with mode 0600 inside a private per-run directory.
+
+        Args:
+            run_dir (str): Private directory removed at the end of the run.
+            kubeconfig_path (str): Path to the account's kubeconfig, as returned by update_kubeconfig.
+            context (str): The cluster's context name in that kubeconfig.
+            token (str): Bearer token from generate_token.
+
+        Returns:
+            str: Path to the written kubeconfig.
+        """
+        with _kubeconfig_lock(kubeconfig_path):
+            cluster_entry = next(
+                item for item in _loaded_kubeconfigs[kubeconfig_path]["clusters"] if item["name"] == context
+            )
+        session_kubeconfig = {
+            "apiVersion": "v1",
+            "kind": "Config",
+            "preferences": {},
+            "clusters": [cluster_entry],
+            "contexts": [{"name": context, "context": {"cluster": context, "user": context}}],
+            "current-context": context,
+            "users": [{"name": context, "user": {"token": token}}],
+        }
+        account_id = os.path.splitext(os.path.basename(kubeconfig_path))[0]
+        session_path = os.path.join(run_dir, f"{account_id}_{context.replace('/', '_')}.kubeconfig")
+        # JSONUtils.dump writes through tempfile.mkstemp, which creates the file with mode 0600.
+        JSONUtils.dump(session_path, session_kubeconfig)
+        return session_path
+
+    @staticmethod
+    async def read_kubectl_output(cluster_name, command_type, stream):
+        """
+        Parse kubectl output line by line as it arrives, without buffering the whole output first.
+
+        Args:
+            cluster_name (str): EKS cluster name prefixed to every row.
+            command_type (str): The kubectl subcommand, e.g. "get" or "logs".
+            stream (asyncio.StreamReader): The kubectl stdout stream.
+
+        Returns:
+            list: Log lines prefixed with the cluster name for "logs", otherwise table rows
+            split into columns according to the header line.
+        """
+        rows = []
+        column_count = None
+        stamp_second = None
+        async for raw_line in _read_lines(stream):
+            line = raw_line.decode(errors="replace").rstrip("\r")
+            if command_type == "logs":
+                now = int(time.time())
+                if now != stamp_second:
+                    stamp_second = now
+                    prefix = f"[{cluster_name}][{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))}] "
+                rows.append([prefix + line])
+            elif column_count is None:
+                column_count = len(line.split())
+            else:
+                rows.append([cluster_name] + line.split(None, column_count - 1))
+        return rows
+
+    @staticmethod
+    async def execute_kubectl_command(cluster_name, kubeconfig_path, kubectl_args, context=None):
         """
         Execute a kubectl command on a specific cluster using the provided kubeconfig.
+        kubectl runs as an asyncio subprocess so many clusters can be queried from a single thread.
 
         Args:
             cluster_name (str): EKS cluster name.
             kubeconfig_path (str): Path to the kubeconfig file.
             kubectl_args (list): Arguments for the kubectl command.
+            context (str, optional): The kubeconfig context selecting the cluster.
 
         Returns:
             list: Parsed output from the kubectl command.
 
         Raises:
-            subprocess.CalledProcessError: If kubectl encounters a fatal error.
-            subprocess.TimeoutExpired: If the command times out.
+            FileNotFoundError: If kubectl is not installed.
         """
         command_type = kubectl_args[0] if kubectl_args else "get"
         timeout = 20
+        command = [KUBECTL_BIN, "--kubeconfig", kubeconfig_path]
+        if context:
+            command += ["--context", context]
 
         for attempt in range(MultiKubeConfig.RETRY_COUNT):
             try:
-                result = subprocess.run(
-                    ["kubectl", "--kubeconfig", kubeconfig_path] + kubectl_args,
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout,
-                    check=True,
+                process = await asyncio.create_subprocess_exec(
+                    *command,
+                    *kubectl_args,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
                 )
-                output_lines = result.stdout.splitlines()
-                if command_type == "logs":
-                    return [
-                        [f"[{cluster_name}][{time.strftime('%Y-%m-%d %H:%M:%S')}] {line}"]
-                        for line in output_lines
-                    ]
-                elif output_lines:
-                    data = [
-                        [cluster_name] + line.split(None, len(output_lines[0].split()) - 1)
-                        for line in output_lines[1:]
-                    ]
-                    return data
-                return []
+                try:
+                    rows, stderr, _ = await asyncio.wait_for(
+                        asyncio.gather(
+                            KubeUtils.read_kubectl_output(cluster_name, command_type, process.stdout),
+                            process.stderr.read(),
+                            process.wait(),
+                        ),
+                        timeout=timeout,
+                    )
+                except BaseException:
+                    # Never leave kubectl running behind a timeout, a parse error or a cancellation.
+                    if process.returncode is None:
+                        process.kill()
+                        await process.wait()
+                    raise
+                if process.returncode != 0:
+                    raise subprocess.CalledProcessError(process.returncode, command, stderr=stderr.decode())
+                return rows
 
             except subprocess.CalledProcessError as e:
                 if "not found" in e.stderr:
                     logger.info("Pod not found in cluster %s, skipping.", cluster_name)
                     return []
                 if attempt < MultiKubeConfig.RETRY_COUNT - 1:
-                    time.sleep(MultiKubeConfig.RETRY_BACKOFF * (2**attempt))
+                    # Jitter spreads out retries so throttled clusters do not all retry at once.
+                    await asyncio.sleep(MultiKubeConfig.RETRY_BACKOFF * (2**attempt) + random.random())
                     continue
                 logger.error("Error running kubectl on %s:\n %s", cluster_name, e.stderr.strip())
                 return []
-            except subprocess.TimeoutExpired:
+            except asyncio.TimeoutError:
                 logger.error("Timeout expired for cluster %s, skipping.", cluster_name)
                 return []
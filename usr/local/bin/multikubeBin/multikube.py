@@ -1,12 +1,12 @@
 #!/usr/local/bin/multikubeBin/venv/bin/python
 import argparse
-import re
+import asyncio
 import os
 import sys
+import tempfile
 import logging
-from tabulate2 import tabulate
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from modules.aws_utils import AWSUtils
+from modules.config import MultiKubeConfig
 from modules.context_utils import ContextManager
 from modules.kubectl_utils import KubeUtils
 
@@ -18,11 +18,29 @@ site_packages = os.path.join(
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+
+TABLE_HEADERS = ["CLUSTER", "NAME", "READY", "STATUS", "RESTARTS", "AGE"]
+
+def positive_int(value):
+    """
+    Argparse type accepting only integers greater than zero.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive integer.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got '{value}'")
+    return number
+
 def parse_args():
     """
     Parse command-line arguments for the MultiKube tool. This setup distinguishes between
-    MultiKube-specific options and kubectl arguments. If the first argument is not a recognized
-    option for MultiKube, it assumes that all arguments are meant for kubectl.
+    MultiKube-specific options and kubectl arguments. MultiKube options must come first; everything
+    from the first argument that is not a MultiKube option onwards is passed to kubectl untouched.
     """
     description = """
     MultiKube is a multi-cluster Kubernetes management tool designed to simplify the management of multiple
@@ -35,18 +53,25 @@ def parse_args():
         python multikube --store-clusters-contexts pattern
         python multikube --set-clusters-contexts mycontext
         python multikube get pods --all
+        python multikube --max-concurrency 8 get pods
     """
 
     # Set of recognized MultiKube-specific command-line options
-    multikube_options = {'--init', '--store-clusters-contexts', '--set-clusters-contexts', '--renew-cache', '--help'}
-
-    # Check if the first command-line argument is a recognized MultiKube option
-    if len(sys.argv) > 1 and not any(opt == sys.argv[1] for opt in multikube_options):
-        # If not, treat all arguments as kubectl arguments
-        return argparse.Namespace(kubectl_args=sys.argv[1:], init=False, store_clusters_contexts=None,
-                                  set_clusters_contexts=None, renew_cache=False)
-
-    parser = argparse.ArgumentParser(description=description, epilog=epilog,
+    multikube_options = {'--init', '--store-clusters-contexts', '--set-clusters-contexts', '--renew-cache',
+                         '--max-concurrency', '--help'}
+    # Options among them that take a value
+    valued_options = {'--store-clusters-contexts', '--set-clusters-contexts', '--max-concurrency'}
+
+    # Split the arguments at the first one that is not a MultiKube option or its value
+    argv = sys.argv[1:]
+    split = 0
+    while split < len(argv):
+        option, has_value, _ = argv[split].partition("=")
+        if option not in multikube_options:
+            break
+        split += 2 if option in valued_options and not has_value else 1
+
+    parser = argparse.ArgumentParser(description=description, epilog=epilog, allow_abbrev=False,
                                      formatter_class=argparse.RawDescriptionHelpFormatter)
     parser.add_argument("--init", action="store_true", help="Initialize or refresh the cluster cache.")
     parser.add_argument("--store-clusters-contexts", metavar="PATTERN",
@@ -55,10 +80,13 @@ def parse_args():
                         help="Set the default cluster context to use for kubectl commands.")
     parser.add_argument("--renew-cache", action="store_true",
                         help="Force a renewal of the cluster cache regardless of its current state.")
+    parser.add_argument("--max-concurrency", metavar="N", type=positive_int, default=MultiKubeConfig.MAX_CONCURRENCY,
+                        help="Maximum number of clusters processed concurrently (default: %(default)s).")
     parser.add_argument("kubectl_args", nargs='*',
                         help="Pass-through arguments for the kubectl command.")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv[:split])
+    args.kubectl_args = argv[split:]
     return args
 
 def handle_cache_initialization(args):
@@ -69,14 +97,17 @@ def handle_cache_initialization(args):
         args (argparse.Namespace): The parsed command-line arguments.
 
     Effects:
-        Exits the program after initializing the cache or logs an error if no profiles are found.
+        Exits the program after initializing the cache, with a non-zero status if no profiles are found
+        or no cluster could be listed.
     """
     if args.init:
         profiles = AWSUtils.load_profiles_from_aws_config()
         if not profiles:
             logger.error("No AWS profiles found in ~/.aws/config.")
             sys.exit(1)
-        AWSUtils.generate_cache(profiles, True)
+        if not AWSUtils.generate_cache(profiles, True, args.max_concurrency):
+            logger.error("Cluster cache initialization failed; check the AWS credentials of your profiles.")
+            sys.exit(1)
         logger.info("Cluster cache initialized.")
         sys.exit(0)
 
@@ -116,10 +147,11 @@ def prepare_clusters_for_command_execution(args):
         args (argparse.Namespace): The parsed command-line arguments.
 
     Returns:
-        list of tuples: A list containing tuples of (cluster_name, profile, region) for each matched cluster.
+        list of tuples: A list containing tuples of (cluster_name, profile, region, account_id) for each matched cluster.
 
     Effects:
-        Exits the program if no matching clusters are found or if there is no default cluster pattern.
+        Exits the program if no matching clusters are found, if there is no default cluster pattern,
+        or if no cluster cache exists and refreshing it failed.
     """
     cluster_pattern = ContextManager.get_default_context_pattern()
     if not cluster_pattern:
@@ -132,75 +164,132 @@ def prepare_clusters_for_command_execution(args):
         sys.exit(1)
 
     if args.renew_cache or not AWSUtils.is_cache_fresh():
-        AWSUtils.generate_cache(profiles)
+        if not AWSUtils.generate_cache(profiles, max_concurrency=args.max_concurrency):
+            if not os.path.exists(MultiKubeConfig.CACHE_FILE):
+                logger.error("No cluster cache is available. Run 'multikube --init' to log in and build it.")
+                sys.exit(1)
+            logger.warning("Using the existing cluster cache. Run 'multikube --init' if the SSO session has expired.")
 
     cache_data = AWSUtils.load_cache()
-    clusters_to_process = []
-    pattern = re.compile(cluster_pattern)
-    for profile, clusters in cache_data.items():
-        for cluster in clusters:
-            cluster_name = cluster.split("/")[2]
-            region = cluster.split("/")[1]
-            if pattern.match(cluster_name):
-                clusters_to_process.append((cluster_name, profile, region))
+    matches = ContextManager.build_cluster_matcher(cluster_pattern)
+    clusters_to_process = [
+        (record["name"], profile, record["region"], record["account_id"])
+        for profile, records in cache_data.items()
+        for record in records
+        if matches(record["name"])
+    ]
 
     if not clusters_to_process:
         logger.error("No matching clusters found for the pattern.")
         sys.exit(1)
     return clusters_to_process
 
-def execute_kubectl_commands(clusters_to_process, args):
+async def run_kubectl_on_cluster(semaphore, cluster_name, profile, region, account_id, kubectl_args,
+                                 kubeconfig_mtimes, run_dir):
     """
-    Executes kubectl commands across multiple clusters in parallel.
+    Prepares the kubeconfig and a bearer token for a single cluster and runs the kubectl command against it.
+    The blocking AWS calls run in worker threads; kubectl itself runs as an asyncio subprocess.
+
+    Args:
+        semaphore (asyncio.Semaphore): Limits how many clusters are processed concurrently.
+        cluster_name (str): EKS cluster name.
+        profile (str): AWS profile name.
+        region (str): AWS region of the cluster.
+        account_id (str): AWS account ID owning the cluster.
+        kubectl_args (list): Arguments for the kubectl command.
+        kubeconfig_mtimes (dict): Modification times of the existing kubeconfig files.
+        run_dir (str): Private directory holding the token-bearing kubeconfigs of this run.
+
+    Returns:
+        list: Parsed output from the kubectl command.
+    """
+    async with semaphore:
+        kubeconfig_path, context = await asyncio.to_thread(
+            KubeUtils.update_kubeconfig, cluster_name, profile, region, account_id, kubeconfig_mtimes
+        )
+        token = await asyncio.to_thread(KubeUtils.generate_token, cluster_name, profile, region)
+        session_kubeconfig_path = await asyncio.to_thread(
+            KubeUtils.write_session_kubeconfig, run_dir, kubeconfig_path, context, token
+        )
+        return await KubeUtils.execute_kubectl_command(cluster_name, session_kubeconfig_path, kubectl_args, context)
+
+async def execute_kubectl_commands(clusters_to_process, args):
+    """
+    Executes kubectl commands across multiple clusters concurrently on a single event loop.
 
     Args:
         clusters_to_process (list of tuples): Clusters prepared for command execution.
         args (argparse.Namespace): The parsed command-line arguments.
 
-    Returns:
-        list: A list of outputs from each kubectl command execution.
+    Yields:
+        list: The parsed output of each cluster, as soon as that cluster completes.
 
     Effects:
         Logs an error if any command processing fails.
     """
-    all_data = []
-    with ThreadPoolExecutor() as executor:
-        futures = {
-            executor.submit(
-                KubeUtils.execute_kubectl_command,
-                cluster_name,
-                KubeUtils.update_kubeconfig(cluster_name, profile, region),
-                args.kubectl_args
-            ): (cluster_name, profile, region)
-            for cluster_name, profile, region in clusters_to_process
-        }
-        for future in as_completed(futures):
+    semaphore = asyncio.Semaphore(args.max_concurrency)
+    kubeconfig_mtimes = KubeUtils.scan_kubeconfigs()
+    with tempfile.TemporaryDirectory(prefix="multikube-") as run_dir:
+        tasks = [
+            asyncio.ensure_future(run_kubectl_on_cluster(
+                semaphore, cluster_name, profile, region, account_id, args.kubectl_args, kubeconfig_mtimes, run_dir
+            ))
+            for cluster_name, profile, region, account_id in clusters_to_process
+        ]
+        for next_completed in asyncio.as_completed(tasks):
             try:
-                output = future.result()
-                if output:
-                    all_data.extend(output)
+                output = await next_completed
             except Exception as exc:
                 logger.error("Error processing a cluster: %s", exc)
-    return all_data
+                continue
+            if output:
+                yield output
+
+def format_row(row, widths):
+    """
+    Formats a table row with left-aligned columns separated by two spaces. Cells beyond the
+    known column widths are appended unpadded.
+
+    Args:
+        row (list): The cells of the row.
+        widths (list): The column widths.
+
+    Returns:
+        str: The formatted row.
+    """
+    cells = [cell.ljust(width) for cell, width in zip(row, widths)] + list(row[len(widths):])
+    return "  ".join(cells).rstrip()
 
-def display_results(args, all_data):
+async def display_results(args, results):
     """
-    Displays results from kubectl commands based on the command type.
+    Displays results from kubectl commands based on the command type, printing each cluster's
+    output as soon as it arrives. Table column widths are sized from the first cluster to complete.
 
     Args:
         args (argparse.Namespace): The parsed command-line arguments.
-        all_data (list): The collected data from all executed kubectl commands.
+        results (async iterator): The parsed output of each cluster, as produced by execute_kubectl_commands.
 
     Effects:
         Prints results to stdout or logs a message if no data is returned.
     """
-    if args.kubectl_args and args.kubectl_args[0] == "logs":
-        for entry in all_data:
-            print(entry[0])
-    elif all_data:
-        headers = ["CLUSTER", "NAME", "READY", "STATUS", "RESTARTS", "AGE"]
-        print(tabulate(all_data, headers=headers, tablefmt="plain"))
-    else:
+    is_logs = bool(args.kubectl_args) and args.kubectl_args[0] == "logs"
+    widths = None
+    async for output in results:
+        if is_logs:
+            for entry in output:
+                print(entry[0])
+            continue
+        if widths is None:
+            widths = [len(header) for header in TABLE_HEADERS]
+            for row in output:
+                widths += [0] * (len(row) - len(widths))
+                for index, cell in enumerate(row):
+                    widths[index] = max(widths[index], len(cell))
+            print(format_row(TABLE_HEADERS, widths))
+        for row in output:
+            print(format_row(row, widths))
+
+    if not is_logs and widths is None:
         logger.info("No data returned from the kubectl command.")
 
 def main():
@@ -209,8 +298,7 @@ def main():
     handle_cache_initialization(args)
     handle_context_management(args)
     clusters_to_process = prepare_clusters_for_command_execution(args)
-    all_data = execute_kubectl_commands(clusters_to_process, args)
-    display_results(args, all_data)
+    asyncio.run(display_results(args, execute_kubectl_commands(clusters_to_process, args)))
 
 if __name__ == "__main__":
     main()